@@ -1,9 +1,13 @@
 import os
 import re
 import csv
+import sys
 import imaplib
 import email
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 
 # Optional deps
@@ -18,11 +22,32 @@ except Exception:
     load_dotenv = None
 
 from email.header import decode_header
+from email.parser import BytesHeaderParser
+try:
+    from selectolax.parser import HTMLParser  # C (lexbor) HTML parser
+except Exception:  # pragma: no cover - fallback to BeautifulSoup/regex
+    HTMLParser = None
+
 try:
     from bs4 import BeautifulSoup
 except Exception:  # pragma: no cover - fallback if BeautifulSoup isn't installed
     BeautifulSoup = None
 
+try:
+    import ahocorasick  # fast multi-pattern literal matching
+except Exception:  # pragma: no cover - fallback to plain regex scanning
+    ahocorasick = None
+
+try:
+    import re2  # google-re2: linear-time DFA engine, no backtracking
+except Exception:  # pragma: no cover - fallback to stdlib re
+    re2 = None
+
+try:
+    import hyperscan  # SIMD multi-pattern scanner; one pass for all patterns
+except Exception:  # pragma: no cover - fallback to AC/regex matchers
+    hyperscan = None
+
 # ─── Setup Logging ────────────────────────────────────────────────────────────
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 logger = logging.getLogger(__name__)
@@ -70,15 +95,15 @@ EMAIL_USER, EMAIL_PASS = _get_credentials()
 
 # ─── Patterns ────────────────────────────────────────────────────────────────
 STATUS_PATTERNS = {
-    "Interview Requested": [
+    "Interview Requested": (
         re.compile(r'(schedule|availability|book|invite).*interview', re.I),
         re.compile(r'interview.*(scheduled|invite|booking)', re.I),
         re.compile(r'invitation to interview', re.I),
         re.compile(r'recruiter.*reach out', re.I),
         re.compile(r'(schedule|set up|arrange).*(call|meeting|interview)', re.I),
         re.compile(r'(phone|video|onsite).*interview', re.I),
-    ],
-    "Rejected": [
+    ),
+    "Rejected": (
         re.compile(r'we will not be moving forward', re.I),
         re.compile(r'we have decided not to proceed', re.I),
         re.compile(r'we regret to inform you', re.I),
@@ -95,8 +120,8 @@ STATUS_PATTERNS = {
         re.compile(r'not selected', re.I),
         re.compile(r'cannot move forward', re.I),
         re.compile(r'passed on your application', re.I),
-    ],
-    "Application Sent": [
+    ),
+    "Application Sent": (
         re.compile(r'thank you for applying', re.I),
         re.compile(r'thank you for your application', re.I),
         re.compile(r'we received your application', re.I),
@@ -104,75 +129,351 @@ STATUS_PATTERNS = {
         re.compile(r'you applied to', re.I),
         re.compile(r'(application|submission).*(received|submitted)', re.I),
         re.compile(r'thank you for your (interest|submission)', re.I),
-    ],
+    ),
 }
 
-INTERVIEW_FALSE_POSITIVES = [
+INTERVIEW_FALSE_POSITIVES = (
     re.compile(r'what happens next', re.I),
     re.compile(r"you['’]ll hear from us", re.I),
     re.compile(r'shortlisted candidates', re.I),
     re.compile(r'you are not selected', re.I),
     re.compile(r'plan for what might occur', re.I),
-]
+)
 
-EXCLUDED_KEYWORDS = [
+EXCLUDED_KEYWORDS = (
     "practice starts", "lyrics", "trees in trust", "league registration",
     "burnout prevention", "unable to cancel", "spotlight on", "serenade",
     "rear of the property", "order confirmation", "unsubscribe"
-]
+)
 
 EXCLUDED_COMPANIES = {
     "gmail", "chapelridge", "prayvine", "squaretrade", "amazon", "ottawa",
     "substack", "rallyandtap", "79246730"
 }
 
+# Fused alternations: one compiled regex per category so each email is scanned
+# once per category instead of once per pattern. The matchers only ever see
+# text that has already been lowercased once per email, so the patterns are
+# compiled case-sensitive - no per-character case folding in the engine.
+def _union(patterns):
+    source = "|".join(f"(?:{p.pattern.lower()})" for p in patterns)
+    if re2 is not None:
+        # The `.*` patterns are quadratic under re's backtracking engine on
+        # long HTML bodies; re2 scans them in linear time.
+        try:
+            return re2.compile(source)
+        except Exception:
+            pass
+    return re.compile(source)
+
+_METACHARS = re.compile(r"[.^$*+?{}\[\]|()\\]")
+
+def _split_literals(patterns):
+    """Partition compiled patterns into plain lowercase phrases and true regexes."""
+    literals, regexes = [], []
+    for p in patterns:
+        if _METACHARS.search(p.pattern):
+            regexes.append(p)
+        else:
+            literals.append(p.pattern.lower())
+    return literals, regexes
+
+def _build_matcher(patterns):
+    """
+    Return matcher(text_lc) -> bool for one pattern list.
+
+    When pyahocorasick is available the literal phrases are folded into one
+    automaton (a single linear pass over the text regardless of phrase count).
+    Without it they run through `str.__contains__`, which is still a C-level
+    two-way search that skips the regex VM entirely. Only the handful of true
+    regexes ever touch the regex engine, through one fused alternation.
+    """
+    literals, regexes = _split_literals(patterns)
+    rx = _union(regexes) if regexes else None
+
+    if ahocorasick is not None and literals:
+        auto = ahocorasick.Automaton()
+        for phrase in literals:
+            auto.add_word(phrase, phrase)
+        auto.make_automaton()
+
+        def match(text):
+            if next(auto.iter(text), None) is not None:
+                return True
+            return rx is not None and rx.search(text) is not None
+
+        return match
+
+    phrases = tuple(literals)
+
+    def match(text):
+        for phrase in phrases:
+            if phrase in text:
+                return True
+        return rx is not None and rx.search(text) is not None
+
+    return match
+
+# One full matcher (literals + fused regex union) per category, tried in
+# STATUS_PATTERNS order: a lower-priority category can never outrank a
+# higher one, whichever kind of pattern it matched with.
+_STATUS_MATCHERS = {status: _build_matcher(pats)
+                    for status, pats in STATUS_PATTERNS.items()}
+_FALSE_POSITIVE_MATCH = _build_matcher(INTERVIEW_FALSE_POSITIVES)
+_EXCLUDED_KEYWORD_MATCH = _build_matcher(tuple(re.compile(re.escape(k)) for k in EXCLUDED_KEYWORDS))
+
 # ─── Helpers ─────────────────────────────────────────────────────────────────
+# Headers-only parser: skips building the MIME body tree entirely, which the
+# header pass never needs.
+_HEADER_PARSER = BytesHeaderParser()
+
+_UID_RE = re.compile(rb'UID (\d+)')
+
+def _iter_fetch_sections(msg_data):
+    """
+    Group a multi-section FETCH response into (message_id, sections) pairs.
+
+    imaplib returns each requested section as a (prefix, literal) tuple and a
+    trailing b')' per message; the prefix of the first section carries the
+    message sequence number and, for UID FETCH responses, the UID item.
+    Yields (id_bytes, sections) where sections maps b'HEADER', b'TEXT',
+    b'1.MIME' and b'1' to their literals, with the UID preferred as the id
+    when present.
+    """
+    msg_id = None
+    sections = {}
+    for item in msg_data:
+        if isinstance(item, tuple) and len(item) >= 2:
+            prefix = item[0]
+            if msg_id is None:
+                uid = _UID_RE.search(prefix)
+                msg_id = uid.group(1) if uid else prefix.split(b' ', 1)[0]
+            if b'HEADER' in prefix:
+                sections[b'HEADER'] = item[1]
+            elif b'1.MIME' in prefix:
+                sections[b'1.MIME'] = item[1]
+            elif b'[1]' in prefix:
+                sections[b'1'] = item[1]
+            elif b'TEXT' in prefix:
+                sections[b'TEXT'] = item[1]
+        elif sections:
+            yield msg_id, sections
+            msg_id, sections = None, {}
+    if sections:
+        yield msg_id, sections
+
+def _first_part_bytes(sections):
+    """
+    Reassemble a fetched first MIME part (BODY[1.MIME] + BODY[1]) into a
+    standalone parseable message: part headers, blank line, part body.
+    Returns None when the fetch did not produce a usable part.
+    """
+    part = sections.get(b'1')
+    mime = sections.get(b'1.MIME')
+    if not part or not mime:
+        return None
+    return mime + b'\r\n' + part
+
 def decode_str(s):
-    decoded, encoding = decode_header(s)[0]
-    if isinstance(decoded, bytes):
-        return decoded.decode(encoding or 'utf-8', errors='ignore')
-    return decoded
+    if not s:
+        return ""
+    if s.isascii() and "=?" not in s:
+        # Plain ASCII with no RFC 2047 encoded word: nothing to decode.
+        return s
+    return ''.join(
+        (p.decode(enc or 'utf-8', 'ignore') if isinstance(p, bytes) else p)
+        for p, enc in decode_header(s)
+    )
+
+def _html_to_text(html):
+    """Strip HTML to text: selectolax (C parser) > BeautifulSoup > regex."""
+    if HTMLParser is not None:
+        try:
+            return HTMLParser(html).text(separator=' ')
+        except Exception:
+            pass
+    if BeautifulSoup:
+        soup = BeautifulSoup(html, "html.parser")
+        return soup.get_text()
+    return re.sub(r'<[^>]+>', '', html)
+
+# No phrase we match appears beyond the first screen of text, so decoding
+# more than this per message is wasted work.
+_MAX_BODY_BYTES = 65536
+
+def _decoded_text(part):
+    """Decode one MIME part's payload, capped at _MAX_BODY_BYTES."""
+    payload = part.get_payload(decode=True)
+    if payload is None:
+        return ""
+    return payload[:_MAX_BODY_BYTES].decode(errors='ignore')
 
 def extract_text_from_email(msg):
     if msg.is_multipart():
+        # Walk once collecting candidate parts; decode only the one we use.
+        plain_part = html_part = None
         for part in msg.walk():
+            if part.get_content_disposition() == "attachment":
+                continue
             content_type = part.get_content_type()
             if content_type == "text/plain":
-                return part.get_payload(decode=True).decode(errors='ignore')
-        for part in msg.walk():
-            if part.get_content_type() == "text/html":
-                html = part.get_payload(decode=True).decode(errors='ignore')
-                if BeautifulSoup:
-                    soup = BeautifulSoup(html, "html.parser")
-                    return soup.get_text()
-                return re.sub(r'<[^>]+>', '', html)
+                plain_part = part
+                break
+            if html_part is None and content_type == "text/html":
+                html_part = part
+        if plain_part is not None:
+            return _decoded_text(plain_part)
+        if html_part is not None:
+            return _html_to_text(_decoded_text(html_part))
     else:
-        payload = msg.get_payload(decode=True).decode(errors='ignore')
-        if msg.get_content_type() == "text/html":
-            if BeautifulSoup:
-                soup = BeautifulSoup(payload, "html.parser")
-                return soup.get_text()
-            return re.sub(r'<[^>]+>', '', payload)
+        content_type = msg.get_content_type()
+        if not content_type.startswith("text/"):
+            # image/pdf/binary payloads never classify; skip the decode.
+            return ""
+        payload = _decoded_text(msg)
+        if content_type == "text/html":
+            return _html_to_text(payload)
         return payload
     return ""
 
-def classify_email(subject, body):
-    if any(pat.search(subject) or pat.search(body) for pat in INTERVIEW_FALSE_POSITIVES):
+def _build_hyperscan():
+    """
+    Compile every status and false-positive pattern into one Hyperscan
+    database: a single vectorized pass over the text reports the ids of all
+    matching patterns at once. Returns (db, id_to_status, first_fp_id), or
+    (None, None, None) when hyperscan is absent or refuses a pattern.
+    """
+    if hyperscan is None:
+        return None, None, None
+    expressions, ids, id_to_status = [], [], {}
+    for status, pats in STATUS_PATTERNS.items():
+        for p in pats:
+            ids.append(len(expressions))
+            id_to_status[len(expressions)] = status
+            expressions.append(p.pattern.lower().encode())
+    first_fp_id = len(expressions)
+    for p in INTERVIEW_FALSE_POSITIVES:
+        ids.append(len(expressions))
+        expressions.append(p.pattern.lower().encode())
+    try:
+        db = hyperscan.Database()
+        # HS_FLAG_UTF8 keeps byte-mode scanning from splitting multi-byte
+        # characters: the scanned text is UTF-8, and patterns like the curly
+        # apostrophe in the false positives must match it whole.
+        db.compile(expressions=expressions, ids=ids,
+                   flags=[hyperscan.HS_FLAG_UTF8] * len(expressions))
+    except Exception:
+        return None, None, None
+    return db, id_to_status, first_fp_id
+
+_HS_DB, _HS_ID_TO_STATUS, _HS_FIRST_FP_ID = _build_hyperscan()
+_HS_LOCAL = threading.local()  # hyperscan scratch is per-thread
+
+def _hs_classify(text):
+    """Hyperscan path of _classify_text; one scan yields every pattern hit."""
+    scratch = getattr(_HS_LOCAL, "scratch", None)
+    if scratch is None:
+        scratch = _HS_LOCAL.scratch = hyperscan.Scratch(_HS_DB)
+    matched = set()
+    _HS_DB.scan(text.encode(), match_event_handler=lambda pat_id, *_: matched.add(pat_id),
+                scratch=scratch)
+    if not matched or any(mid >= _HS_FIRST_FP_ID for mid in matched):
+        return None
+    statuses = {_HS_ID_TO_STATUS[mid] for mid in matched}
+    for status in STATUS_PATTERNS:  # keep category priority
+        if status in statuses:
+            return status
+    return None
+
+def _classify_text(text):
+    """Classify pre-lowercased text: false positives first, then each
+    category's matcher in STATUS_PATTERNS (priority) order."""
+    if _HS_DB is not None:
+        return _hs_classify(text)
+    if _FALSE_POSITIVE_MATCH(text):
         return None
-    for status, patterns in STATUS_PATTERNS.items():
-        for pat in patterns:
-            if pat.search(subject) or pat.search(body):
-                return status
+    for status, match in _STATUS_MATCHERS.items():
+        if match(text):
+            return status
     return None
 
+def classify_subject(subject):
+    """
+    Subject-only fast path. Returns a status when the subject alone is
+    conclusive (and no false positive fires on it); None means the body is
+    needed to decide.
+    """
+    return _classify_text(subject.lower())
+
+def classify_email(subject, body):
+    return _classify_text((subject + "\n" + body).lower())
+
+def _classify_body_raw(subject, raw_bytes):
+    """
+    Parse one raw body (a reassembled first part or a full message) and
+    classify it against the already-decoded subject. Takes plain arguments
+    and returns a status string (or None) so it can cross a process
+    boundary - worker processes import this module and get the compiled
+    matchers for free.
+    """
+    body = extract_text_from_email(email.message_from_bytes(raw_bytes))
+    return classify_email(subject, body)
+
+def _sender_company(sender):
+    """First label of the sender's domain, title-cased - plain string ops."""
+    at = sender.rfind('@')
+    if at < 0:
+        return "Unknown"
+    domain = sender[at + 1:]
+    for sep in ('>', ' '):
+        cut = domain.find(sep)
+        if cut >= 0:
+            domain = domain[:cut]
+    label = domain.split('.', 1)[0].strip()
+    return label.title() if label else "Unknown"
+
+@dataclass(slots=True)
+class Application:
+    """One tracked application; slots keep thousands of records cheap."""
+    company: str
+    job_title: str
+    status: str
+    date_applied: str
+    last_update_ts: float
+    last_update_str: str
+    subject: str
+
+def _add_application(applications, subject, sender, date_obj, ts, status):
+    """Derive company/title from the headers and upsert the newest record."""
+    # The same company recurs across many emails; interning shares one string
+    # object whose hash is computed once, cheapening the (company, title)
+    # dict-key probes below. Status labels are already shared module literals.
+    company = sys.intern(_sender_company(sender))
+    if is_irrelevant_email(subject, sender, company):
+        return
+
+    job_title = subject.split(" at ")[-1] if " at " in subject else subject
+    key = (company, job_title)
+    # Comparing cached POSIX timestamps is a single float compare instead of
+    # datetime's field-by-field rich comparison.
+    if key not in applications or ts > applications[key].last_update_ts:
+        # isoformat()[:10] is plain C string slicing, ~3x cheaper than
+        # strftime, and the cached string saves re-formatting at CSV time.
+        date_str = date_obj.isoformat()[:10]
+        applications[key] = Application(
+            company=company,
+            job_title=job_title.strip(),
+            status=status,
+            date_applied=date_str,
+            last_update_ts=ts,
+            last_update_str=date_str,
+            subject=subject,
+        )
+
 def is_irrelevant_email(subject, sender, company):
-    lower_subject = subject.lower()
-    lower_company = company.lower()
-    if any(keyword in lower_subject for keyword in EXCLUDED_KEYWORDS):
-        return True
-    if lower_company in EXCLUDED_COMPANIES:
+    if _EXCLUDED_KEYWORD_MATCH(subject.lower()):
         return True
-    return False
+    return company.lower() in EXCLUDED_COMPANIES
 
 # ─── Core logic ──────────────────────────────────────────────────────────────
 def process_job_emails():
@@ -182,185 +483,185 @@ def process_job_emails():
 
     applications = {}
     three_months_ago = datetime.now(timezone.utc) - timedelta(days=90)
+    cutoff_ts = three_months_ago.timestamp()
     try:
-        # Enable IMAP debug logging
-        imaplib.Debug = 4  # Maximum debug output
-        
+        # Protocol tracing stringifies every IMAP frame to stderr and costs
+        # double-digit percent on large fetches; opt in via IMAP_DEBUG=4.
+        imaplib.Debug = int(os.environ.get("IMAP_DEBUG", "0"))
+
         imap_server = os.environ.get("IMAP_SERVER", "imap.gmail.com")
-        logger.info(f"Connecting to IMAP server: {imap_server}")
-        logger.info(f"Using email user: {EMAIL_USER}")
         mailbox = "INBOX"
-        logger.info(f"Selecting mailbox: {mailbox}")
-        
+
         with imaplib.IMAP4_SSL(imap_server) as mail:
             try:
-                login_result = mail.login(EMAIL_USER, EMAIL_PASS)
-                logger.info(f"Login result: {login_result}")
+                mail.login(EMAIL_USER, EMAIL_PASS)
             except Exception as e:
                 logger.error(f"Login failed: {str(e)}")
                 raise
 
             try:
-                select_result = mail.select(mailbox)
-                logger.info(f"Select mailbox result: {select_result}")
+                mail.select(mailbox)
             except Exception as e:
                 logger.error(f"Select mailbox failed: {str(e)}")
                 raise
 
-            logger.info("📬 Scanning inbox...")
-            
-            # Start with the most basic IMAP command possible to verify the connection works
-            logger.info("Testing basic IMAP search...")
-            try:
-                result, data = mail.search(None, 'ALL')
-                logger.info(f"Basic search result: {result}")
-                logger.info(f"Basic search data: {data}")
+            # Let the server apply the 90-day window (SINCE) and, where the
+            # SORT extension exists, return ids newest-first so the scan can
+            # stop at the first out-of-window message.
+            since_date = three_months_ago.strftime('%d-%b-%Y')
+            newest_first = False
+            result = data = None
+            if 'SORT' in mail.capabilities:
+                try:
+                    result, data = mail.uid('SORT', '(REVERSE DATE)', 'UTF-8', 'SINCE', since_date)
+                    newest_first = result == "OK"
+                except Exception as e:
+                    logger.warning(f"IMAP SORT failed, falling back to SEARCH: {e}")
+            if not newest_first:
+                result, data = mail.uid('SEARCH', 'SINCE', since_date)
                 if result != "OK":
-                    raise Exception(f"Basic IMAP search failed with result: {result}")
-            except Exception as e:
-                logger.error(f"Basic IMAP search failed: {str(e)}")
-                raise
-
-            # If basic search works, try date-based search
-            since_date = (datetime.now() - timedelta(days=45)).strftime('%d-%b-%Y')
-            logger.info(f"Using date: {since_date}")
-            
-            # Convert date to INTERNAL IMAP format (DD-MMM-YYYY)
-            try:
-                parsed_date = datetime.strptime(since_date, '%d-%b-%Y')
-                imap_date = parsed_date.strftime('%d-%b-%Y')  # Ensure proper IMAP date format
-                logger.info(f"IMAP formatted date: {imap_date}")
-            except Exception as e:
-                logger.error(f"Date parsing failed: {str(e)}")
-                raise
-
-            success = False
-            try:
-                # Use the most standard IMAP SINCE syntax
-                search_cmd = f'(SINCE {imap_date})'
-                logger.info(f"Attempting search with: {search_cmd}")
-                result, data = mail.search(None, search_cmd)
-                logger.info(f"Search result: {result}")
-                logger.info(f"Raw server response: {data}")
-                
-                if result == "OK":
-                    success = True
-                else:
-                    raise Exception(f"IMAP SINCE search failed with result: {result}")
-                    
-            except Exception as e:
-                logger.error(f"IMAP SINCE search failed: {str(e)}")
-                # Fall back to basic search if date search fails
-                logger.info("Falling back to basic search...")
-                result, data = mail.search(None, 'ALL')
-                if result == "OK":
-                    success = True
-            
-            if not success:
-                logger.error("All search attempts failed")
-                raise Exception("Could not perform IMAP search with any syntax variation")
-
-            if result != "OK":
-                logger.error("IMAP search failed")
-                return {}
+                    logger.error("IMAP search failed")
+                    return {}
 
             email_ids = data[0].split()
             logger.info(f"📧 Found {len(email_ids)} recent emails to check")
             if not email_ids:
                 return {}
 
-            # Sort newest first (so we can break early once older than 90d)
-            try:
-                id_str = ','.join(eid.decode() for eid in email_ids)
-                result, header_data = mail.fetch(id_str, "(BODY.PEEK[HEADER.FIELDS (DATE)])")
-                if result == "OK":
-                    dates = []
-                    for k in range(0, len(header_data), 2):
-                        if len(header_data[k]) < 2:
-                            continue
-                        hdr_msg = email.message_from_bytes(header_data[k][1])
-                        date_header = hdr_msg.get("Date")
-                        date_obj = email.utils.parsedate_to_datetime(date_header)
-                        if date_obj.tzinfo is None:
-                            date_obj = date_obj.replace(tzinfo=timezone.utc)
-                        dates.append(date_obj)
-                    email_ids = [eid for _, eid in sorted(zip(dates, email_ids), key=lambda p: p[0], reverse=True)]
-            except Exception:
-                logger.exception("Failed to sort emails by date")
-
             BATCH_SIZE = 50
-            stop_processing = False
-            for i in range(0, len(email_ids), BATCH_SIZE):
-                batch_ids = email_ids[i:i+BATCH_SIZE]
-                id_str = ','.join(eid.decode() for eid in batch_ids)
-                result, msg_data = mail.fetch(id_str, "(RFC822)")
-                if result != "OK":
-                    continue
 
-                for j in range(0, len(msg_data), 2):
-                    if len(msg_data[j]) < 2:
-                        continue
-                    full_msg = email.message_from_bytes(msg_data[j][1])
-                    subject = decode_str(full_msg.get("Subject", ""))
-                    sender = decode_str(full_msg.get("From", ""))
-                    date_str = full_msg.get("Date")
-                    try:
-                        date_obj = email.utils.parsedate_to_datetime(date_str)
-                        if date_obj.tzinfo is None:
-                            date_obj = date_obj.replace(tzinfo=timezone.utc)
-                    except Exception:
-                        logger.warning("Failed to parse email date '%s'; skipping message", date_str)
-                        continue
-                    if date_obj < three_months_ago:
-                        stop_processing = True
-                        break
+            def _batched_fetch(ids, parts):
+                """
+                Yield the msg_data of each successful batch FETCH, keeping the
+                next batch in flight on a single worker thread while the
+                current one is parsed (one worker means at most one IMAP
+                command is ever outstanding on the connection).
+                """
+                batches = [ids[i:i+BATCH_SIZE] for i in range(0, len(ids), BATCH_SIZE)]
 
-                    body = extract_text_from_email(full_msg)
+                def fetch(batch_ids):
+                    id_str = ','.join(eid.decode() for eid in batch_ids)
+                    return mail.uid('FETCH', id_str, parts)
 
-                    status = classify_email(subject, body)
-                    if not status:
+                prefetcher = ThreadPoolExecutor(max_workers=1)
+                try:
+                    future = prefetcher.submit(fetch, batches[0]) if batches else None
+                    for n in range(len(batches)):
+                        result, msg_data = future.result()
+                        if n + 1 < len(batches):
+                            future = prefetcher.submit(fetch, batches[n + 1])
+                        if result == "OK":
+                            yield msg_data
+                finally:
+                    # Wait for any in-flight FETCH before handing the
+                    # connection back: the consumer can abandon the generator
+                    # early (newest-first cutoff), and imaplib cannot take a
+                    # second command while one is still on the wire.
+                    prefetcher.shutdown(wait=True)
+
+            def _parse_header(header_bytes):
+                """Return (subject, sender, date_obj) or None if the date is bad."""
+                hdr_msg = _HEADER_PARSER.parsebytes(header_bytes)
+                subject = decode_str(hdr_msg.get("Subject", ""))
+                sender = decode_str(hdr_msg.get("From", ""))
+                date_str = hdr_msg.get("Date")
+                try:
+                    date_obj = email.utils.parsedate_to_datetime(date_str)
+                    if date_obj.tzinfo is None:
+                        date_obj = date_obj.replace(tzinfo=timezone.utc)
+                except Exception:
+                    logger.warning("Failed to parse email date '%s'; skipping message", date_str)
+                    return None
+                return subject, sender, date_obj
+
+            # Pass 1: headers only (PEEK keeps unread flags). Most job emails
+            # classify from the subject alone; those never need a body fetch.
+            needs_body = []
+            stop_scan = False
+            for msg_data in _batched_fetch(email_ids, "(BODY.PEEK[HEADER])"):
+                for msg_id, sections in _iter_fetch_sections(msg_data):
+                    header_bytes = sections.get(b'HEADER')
+                    if header_bytes is None or msg_id is None:
                         continue
-
-                    company = re.findall(r'@([\w.-]+)', sender)
-                    company = company[0].split(".")[0].title() if company else "Unknown"
-                    if is_irrelevant_email(subject, sender, company):
+                    parsed = _parse_header(header_bytes)
+                    if parsed is None:
+                        continue
+                    subject, sender, date_obj = parsed
+                    ts = date_obj.timestamp()
+                    if ts < cutoff_ts:
+                        if newest_first:
+                            # Server returned ids newest-first: everything
+                            # after this point is older still.
+                            stop_scan = True
+                            break
                         continue
 
-                    job_title = subject.split(" at ")[-1] if " at " in subject else subject
-                    key = (company, job_title)
-
-                    if key not in applications or date_obj > applications[key]["last_update"]:
-                        applications[key] = {
-                            "company": company,
-                            "job_title": job_title.strip(),
-                            "status": status,
-                            "date_applied": date_obj.strftime("%Y-%m-%d"),
-                            "last_update": date_obj,
-                            "subject": subject,
-                        }
-
-                if stop_processing:
+                    status = classify_subject(subject)
+                    if status:
+                        _add_application(applications, subject, sender, date_obj, ts, status)
+                    else:
+                        needs_body.append(msg_id)
+                if stop_scan:
                     break
 
+            def _body_pass(ids, parts, body_bytes):
+                """Fetch + classify one body pass; returns the ids whose
+                requested body section came back unusable."""
+                missing = []
+                for msg_data in _batched_fetch(ids, parts):
+                    for msg_id, sections in _iter_fetch_sections(msg_data):
+                        header_bytes = sections.get(b'HEADER')
+                        if header_bytes is None:
+                            continue
+                        parsed = _parse_header(header_bytes)
+                        if parsed is None:
+                            continue
+                        subject, sender, date_obj = parsed
+                        ts = date_obj.timestamp()
+                        if ts < cutoff_ts:
+                            continue
+                        raw = body_bytes(sections)
+                        if raw is None:
+                            if msg_id is not None:
+                                missing.append(msg_id)
+                            continue
+                        body = extract_text_from_email(email.message_from_bytes(raw))
+                        status = classify_email(subject, body)
+                        if status:
+                            _add_application(applications, subject, sender, date_obj, ts, status)
+                return missing
+
+            # Pass 2: headers plus only the first MIME part - usually the
+            # text/plain alternative - so HTML alternatives, inline images
+            # and attachments never cross the wire. The rare message with no
+            # usable first part falls back to a full-text fetch.
+            retry = _body_pass(needs_body,
+                               "(BODY.PEEK[HEADER] BODY.PEEK[1.MIME] BODY.PEEK[1])",
+                               _first_part_bytes)
+            if retry:
+                _body_pass(retry, "(BODY.PEEK[HEADER] BODY.PEEK[TEXT])",
+                           lambda s: (s[b'HEADER'] + s[b'TEXT']) if s.get(b'TEXT') else None)
+
     except Exception as e:
         logger.exception("Failed to process emails: %s", e)
 
     return applications
 
 def save_to_csv(applications, filename="job_applications.csv"):
-    with open(filename, "w", newline='', encoding='utf-8') as f:
+    with open(filename, "w", newline='', encoding='utf-8', buffering=1 << 16) as f:
         writer = csv.writer(f)
         writer.writerow(["Company", "Job Title", "Date Applied", "Current Status", "Last Update", "Email Subject"])
-        for app in applications.values():
-            writer.writerow([
-                app["company"], app["job_title"], app["date_applied"],
-                app["status"], app["last_update"].strftime("%Y-%m-%d"), app["subject"]
-            ])
+        # writerows consumes the generator in C; one buffered stream write
+        # instead of per-row method dispatch.
+        writer.writerows(
+            (app.company, app.job_title, app.date_applied,
+             app.status, app.last_update_str, app.subject)
+            for app in applications.values()
+        )
     logger.info(f"✅ CSV saved to {filename}")
 
 # ─── CLI entrypoint ───────────────────────────────────────────────────────────
 if __name__ == "__main__":
-    import sys  # added import for sys
     # Check command-line arguments for '--open-url'
     if '--open-url' in sys.argv:
         index = sys.argv.index('--open-url')